@@ -0,0 +1,785 @@
+from collections import namedtuple
+from datetime import timedelta
+from functools import lru_cache
+from itertools import combinations
+import numpy as np
+from scipy.optimize import brentq
+from scipy.stats import chi2, ncx2
+import Library_GNSS as GNSS
+
+
+# PDOP at or above this makes a (sub)set unusable, as in RAIMtest.py
+PDOP_THRESHOLD = 6.0
+
+# Number of satellite pairs evaluated per step of the pruned searches
+SEARCH_CHUNK = 16
+
+# Pseudorange error (1 sigma) in meters and false-alarm probability used by
+# the residual fault detection test
+PSEUDORANGE_SIGMA = 5.0
+PROB_FALSE_ALARM = 1e-5
+PROB_MISSED_DETECTION = 1e-3
+
+# RNP APCH horizontal alert limit, 0.3 NM in meters
+HAL_RNP_APCH = 0.3 * 1852.0
+
+# worst / best are lists of (pdop, excluded satellite indices)
+RaimSearchResult = namedtuple(
+    "RaimSearchResult", ["position", "fd", "fde", "pdop", "worst", "best"]
+)
+
+# Availability of one epoch (scalars) or of a batch of epochs (arrays)
+RaimResult = namedtuple(
+    "RaimResult", ["time", "num_sat", "pdop", "position", "fd", "fde", "visible", "worst", "best"]
+)
+
+# outages are (start, end) datetimes; transitions are (before, after)
+# datetime brackets no wider than the requested precision
+Timeline = namedtuple("Timeline", ["outages", "transitions", "evaluations"])
+
+
+@lru_cache(maxsize=64)
+def subset_indices(num_sat, num_excluded):
+    """
+    Index array of every subset that leaves out num_excluded satellites.
+
+    The rows are in the same order as GNSS.combinationX_1 / combinationX_2
+    give for num_excluded = 1 / 2. The arrays depend only on the satellite
+    count, not on which satellites are visible, so they are cached per
+    count (least recently used evicted first; subset_indices.cache_info()
+    reports hits and misses) and are read-only.
+
+    Parameters:
+        num_sat (int): Number of visible satellites.
+        num_excluded (int): Number of satellites left out of each subset.
+
+    Returns:
+        ndarray: (n_subsets, num_sat - num_excluded) satellite indices.
+    """
+    size = num_sat - num_excluded
+    if size < 0:
+        return np.empty((0, 0), dtype=np.intp)
+    if size == 0:
+        # The single empty subset
+        subsets = np.empty((1, 0), dtype=np.intp)
+    else:
+        subsets = np.array(list(combinations(range(num_sat), size)), dtype=np.intp)
+        subsets = subsets.reshape(-1, size)
+    subsets.setflags(write=False)
+    return subsets
+
+
+def satellite_bitmask(selection):
+    """
+    Integer bitmask of a boolean selection over the catalog.
+
+    Bit i is set when satellite i (catalog order of read_tle_file) is selected.
+
+    Parameters:
+        selection (array): (n_sats,) boolean array.
+
+    Returns:
+        int: The bitmask.
+    """
+    packed = np.packbits(np.asarray(selection, dtype=bool), bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def bitmask_to_array(bitmask, num_sat):
+    """
+    Boolean (n_sats,) selection from a satellite_bitmask.
+    """
+    packed = np.frombuffer(int(bitmask).to_bytes((num_sat + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, count=num_sat, bitorder="little").astype(bool)
+
+
+def line_of_sight(sat_position, rec_position):
+    """
+    Line-of-sight unit vectors from the receiver to each satellite.
+
+    Vectorized equivalent of GNSS.calculate_g_matrix.
+
+    Parameters:
+        sat_position (array): (n, 3) satellite ECEF positions.
+        rec_position (array): Receiver ECEF position in the same unit.
+
+    Returns:
+        ndarray: (n, 3) unit vectors.
+    """
+    delta = np.asarray(sat_position, dtype=np.float64) - np.asarray(rec_position, dtype=np.float64)
+    return delta / np.linalg.norm(delta, axis=-1, keepdims=True)
+
+
+def subset_pdop_batch(los, subsets):
+    """
+    PDOP of many satellite subsets in one stacked linear-algebra call.
+
+    Parameters:
+        los (array): (n, 3) or (n, T, 3) line-of-sight unit vectors of the
+            visible satellites.
+        subsets (array): (n_subsets, m) satellite indices, see subset_indices.
+
+    Returns:
+        ndarray: PDOP per subset, shape (n_subsets,) or (n_subsets, T);
+        inf where a subset's geometry is singular.
+    """
+    G = np.asarray(los, dtype=np.float64)[subsets]
+    # pdop_from_los wants satellites on the first axis
+    return GNSS.pdop_from_los(np.moveaxis(G, 1, 0))
+
+
+class SubsetDopEngine:
+    """
+    PDOP of the full set and of every n-1 and n-2 subset from one
+    factorization of G^T G.
+
+    P = (G^T G)^-1 is computed once per epoch. Removing satellite i is a
+    Sherman-Morrison rank-one downdate of P and removing a pair (i, j) is a
+    rank-two Woodbury downdate, so every subset trace comes from the two
+    matrices H = G P G^T and K = G P P G^T without any further inversion.
+
+    Parameters:
+        los (array): (n, ..., 3) line-of-sight unit vectors, satellites on
+            the first axis, optionally batched over epochs or locations.
+        mask (array, optional): (n, ...) boolean selection of the satellites
+            that are in the solution (e.g. the visible ones). Satellites left
+            out by the mask do not change any subset.
+    """
+
+    # Below this, 1 - h (or the 2x2 Woodbury determinant) means the subset
+    # has lost rank
+    SINGULAR_TOL = 1e-10
+
+    def __init__(self, los, mask=None):
+        los = np.asarray(los, dtype=np.float64)
+        if mask is None:
+            mask = np.ones(los.shape[:-1], dtype=bool)
+        self.mask = np.asarray(mask, dtype=bool)
+        self.num_sat = los.shape[0]
+
+        G = np.moveaxis(np.where(self.mask[..., None], los, 0.0), 0, -2)
+        GTG = np.swapaxes(G, -1, -2) @ G
+        self.singular = np.linalg.det(GTG) < 1e-12
+        GTG = np.where(self.singular[..., None, None], np.eye(3), GTG)
+        self.P = np.linalg.inv(GTG)
+        self.trace = np.trace(self.P, axis1=-2, axis2=-1)
+
+        GP = G @ self.P
+        self.H = GP @ np.swapaxes(G, -1, -2)
+        self.K = GP @ np.swapaxes(GP, -1, -2)
+
+    def pdop(self):
+        """
+        PDOP of the full set, shape (...).
+        """
+        return np.where(self.singular, np.inf, np.sqrt(self.trace))
+
+    def pdop_leave_one_out(self):
+        """
+        PDOP with satellite i removed, shape (n, ...).
+        """
+        h = np.moveaxis(np.diagonal(self.H, axis1=-2, axis2=-1), -1, 0)
+        k = np.moveaxis(np.diagonal(self.K, axis1=-2, axis2=-1), -1, 0)
+        denom = 1.0 - h
+        lost = (denom < self.SINGULAR_TOL) | self.singular
+        trace = self.trace + k / np.where(lost, 1.0, denom)
+        return np.where(lost, np.inf, np.sqrt(trace))
+
+    def pdop_leave_two_out(self, pairs=None):
+        """
+        PDOP with each pair of satellites removed.
+
+        Parameters:
+            pairs (array, optional): (n_pairs, 2) excluded satellite indices.
+                Default is every pair, in lexicographic order.
+
+        Returns:
+            tuple: (pdop, pairs) where pdop has shape (n_pairs, ...).
+        """
+        if pairs is None:
+            pairs = subset_indices(self.num_sat, self.num_sat - 2)
+        i, j = pairs[:, 0], pairs[:, 1]
+        H_ii = np.moveaxis(self.H[..., i, i], -1, 0)
+        H_jj = np.moveaxis(self.H[..., j, j], -1, 0)
+        H_ij = np.moveaxis(self.H[..., i, j], -1, 0)
+        K_ii = np.moveaxis(self.K[..., i, i], -1, 0)
+        K_jj = np.moveaxis(self.K[..., j, j], -1, 0)
+        K_ij = np.moveaxis(self.K[..., i, j], -1, 0)
+
+        det = (1.0 - H_ii) * (1.0 - H_jj) - H_ij**2
+        lost = (det < self.SINGULAR_TOL) | self.singular
+        added = ((1.0 - H_jj) * K_ii + (1.0 - H_ii) * K_jj + 2.0 * H_ij * K_ij) / np.where(lost, 1.0, det)
+        return np.where(lost, np.inf, np.sqrt(self.trace + added)), pairs
+
+
+def _top_k_pairs(engine, pairs, bound, k, largest, seed):
+    """
+    Exact top-k leave-two-out PDOPs, evaluating pairs in bound order.
+
+    bound must be an upper bound of each pair's PDOP when largest is True
+    and a lower bound otherwise, so the search can stop as soon as no
+    remaining pair can displace the current k-th value.
+    """
+    found = sorted(seed, reverse=largest)[:k]
+    order = np.argsort(-bound if largest else bound, kind="stable")
+    for start in range(0, len(order), SEARCH_CHUNK):
+        chunk = order[start:start + SEARCH_CHUNK]
+        if len(found) == k:
+            kth = found[-1][0]
+            if (bound[chunk[0]] <= kth) if largest else (bound[chunk[0]] >= kth):
+                break
+        values, chunk_pairs = engine.pdop_leave_two_out(pairs[chunk])
+        found += [(float(v), tuple(int(i) for i in pair)) for v, pair in zip(values, chunk_pairs)]
+        found = sorted(found, reverse=largest)[:k]
+    return found
+
+
+def search_subsets(los, threshold=PDOP_THRESHOLD, k=3, decision_only=False):
+    """
+    Position / RAIM FD / RAIM FDE availability and the extreme subsets of
+    one epoch, without evaluating every subset.
+
+    Uses the fact that removing a satellite never lowers PDOP: every n-2
+    subset is bounded below by its two n-1 parents. The best subsets are
+    found by pruning on that lower bound and the worst ones by pruning on
+    an upper bound from the Woodbury downdate. With decision_only the FDE
+    check stops at the first n-2 subset that reaches the threshold.
+
+    Parameters:
+        los (array): (n, 3) line-of-sight unit vectors of the visible satellites.
+        threshold (float, optional): PDOP threshold. Default is 6.
+        k (int, optional): Number of worst and best subsets to return.
+        decision_only (bool, optional): Only decide availability.
+
+    Returns:
+        RaimSearchResult: availability flags, full-set PDOP and the k worst
+        and k best n-1 / n-2 subsets as (pdop, excluded indices), sorted
+        worst first and best first respectively.
+    """
+    los = np.asarray(los, dtype=np.float64).reshape(-1, 3)
+    num_sat = len(los)
+    engine = SubsetDopEngine(los)
+    pdop = float(engine.pdop())
+    position = num_sat >= 4 and pdop < threshold
+    if num_sat < 5:
+        return RaimSearchResult(position, False, False, pdop, [], [])
+
+    loo = engine.pdop_leave_one_out()
+    fd = bool(loo.max() < threshold)
+    singles = [(float(v), (i,)) for i, v in enumerate(loo)]
+    if num_sat < 6:
+        if decision_only:
+            return RaimSearchResult(position, fd, False, pdop, [], [])
+        worst = sorted(singles, reverse=True)[:k]
+        best = sorted(singles)[:k]
+        return RaimSearchResult(position, fd, False, pdop, worst, best)
+
+    pairs = subset_indices(num_sat, num_sat - 2)
+    lower = np.maximum(loo[pairs[:, 0]], loo[pairs[:, 1]])
+
+    h = np.diagonal(engine.H)
+    kk = np.diagonal(engine.K)
+    # lambda_min(I - U^T P U) >= 1 - h_i - h_j bounds the Woodbury term
+    slack = 1.0 - h[pairs[:, 0]] - h[pairs[:, 1]]
+    upper = np.full(len(pairs), np.inf)
+    ok = slack > SubsetDopEngine.SINGULAR_TOL
+    upper[ok] = np.sqrt(
+        engine.trace + (kk[pairs[ok, 0]] + kk[pairs[ok, 1]]) / slack[ok]
+    )
+
+    if decision_only:
+        # Every pair containing a failing n-1 subset fails as well, and
+        # pairs whose upper bound is below the threshold cannot fail
+        fde = fd
+        if fde:
+            candidates = np.flatnonzero(upper >= threshold)
+            order = candidates[np.argsort(-lower[candidates], kind="stable")]
+            for start in range(0, len(order), SEARCH_CHUNK):
+                values, _ = engine.pdop_leave_two_out(pairs[order[start:start + SEARCH_CHUNK]])
+                if values.max() >= threshold:
+                    fde = False
+                    break
+        return RaimSearchResult(position, fd, fde, pdop, [], [])
+
+    worst = _top_k_pairs(engine, pairs, upper, k, True, singles)
+    best = _top_k_pairs(engine, pairs, lower, k, False, singles)
+    # The overall worst subset is always an n-2 one
+    fde = fd and worst[0][0] < threshold
+    return RaimSearchResult(position, fd, fde, pdop, worst, best)
+
+
+class RaimPredictor:
+    """
+    Position / RAIM FD / RAIM FDE availability predictor.
+
+    Keeps the parsed catalog, receiver frames and subset index arrays warm,
+    so a long-lived process can answer repeated queries without reloading
+    or recomputing them.
+
+    Parameters:
+        tle_file_path (str): Path to the TLE file.
+        elevation_mask (float, optional): Elevation mask in degrees. Default is 10.
+        threshold (float, optional): PDOP threshold. Default is 6.
+        fetch (bool, optional): Download the TLE file when it is stale.
+    """
+
+    def __init__(self, tle_file_path, elevation_mask=10, threshold=PDOP_THRESHOLD, fetch=True):
+        self.tle_file_path = tle_file_path
+        self.elevation_mask = elevation_mask
+        self.threshold = threshold
+        self.fetch = fetch
+        self.reload()
+
+    def reload(self):
+        """
+        Refresh the catalog if the TLE file is stale or has changed.
+        """
+        if self.fetch:
+            GNSS.fetch_tle_data_if_stale(self.tle_file_path)
+        self.satellites = GNSS.load_tle_catalog(self.tle_file_path)
+        self.names = [name for name, satellite in self.satellites]
+
+    def geometry(self, times, lat, lon, alt=0):
+        """
+        Line-of-sight vectors and visibility of the catalog at the given epochs.
+
+        Parameters:
+            times (list): datetime objects in UTC.
+            lat, lon (float): Receiver position in degrees.
+            alt (float, optional): Receiver height in meters.
+
+        Returns:
+            tuple: (los, visible) of shapes (n_sats, T, 3) and (n_sats, T).
+        """
+        jd, fr = GNSS.jday_array(times)
+        r_ecef, error = GNSS.propagate_ecef_batch(self.satellites, jd, fr)
+        frame = GNSS.get_receiver_frame(lat, lon, alt)
+        los, elevation = GNSS.line_of_sight_batch(r_ecef, frame)
+        return los, elevation > self.elevation_mask
+
+    def evaluate(self, time, lat, lon, alt=0, k=3):
+        """
+        Availability of one epoch, with the k worst and best subsets.
+
+        Parameters:
+            time (datetime): Epoch in UTC.
+            lat, lon (float): Receiver position in degrees.
+            alt (float, optional): Receiver height in meters.
+            k (int, optional): Number of worst and best subsets to report.
+
+        Returns:
+            RaimResult: visible is the list of visible satellite names and the
+            subsets in worst / best are (pdop, excluded satellite names).
+        """
+        return self.evaluate_series([time], lat, lon, alt, k)[0]
+
+    def evaluate_series(self, times, lat, lon, alt=0, k=3):
+        """
+        Availability of each epoch with its k worst and best subsets.
+
+        The geometry of all epochs is computed at once; the subset index
+        arrays of each satellite count come from subset_indices.
+
+        Parameters:
+            times (list): datetime objects in UTC.
+            lat, lon (float): Receiver position in degrees.
+            alt (float, optional): Receiver height in meters.
+            k (int, optional): Number of worst and best subsets to report.
+
+        Returns:
+            list: One RaimResult per epoch, as evaluate.
+        """
+        los, visible = self.geometry(times, lat, lon, alt)
+        results = []
+        for t, time in enumerate(times):
+            index = np.flatnonzero(visible[:, t])
+            search = search_subsets(los[index, t], self.threshold, k)
+            names = [self.names[i] for i in index]
+
+            def named(subsets):
+                return [(pdop, tuple(names[i] for i in excluded)) for pdop, excluded in subsets]
+
+            results.append(RaimResult(
+                time, len(index), search.pdop, search.position, search.fd, search.fde,
+                names, named(search.worst), named(search.best),
+            ))
+        return results
+
+    def residual_test(self, times, lat, lon, alt=0, sigma=PSEUDORANGE_SIGMA,
+                      pfa=PROB_FALSE_ALARM, fault=None, rng=None):
+        """
+        Residual fault detection over many epochs on simulated pseudoranges.
+
+        Parameters:
+            times (list): datetime objects in UTC.
+            lat, lon (float): Receiver position in degrees.
+            alt (float, optional): Receiver height in meters.
+            sigma (float, optional): Pseudorange error (1 sigma) in meters.
+            pfa (float, optional): Probability of false alarm.
+            fault (array, optional): (n_sats,) or (n_sats, T) bias in meters.
+            rng (numpy.random.Generator, optional): Random number generator.
+
+        Returns:
+            tuple: (statistic, threshold, detected) arrays of shape (T,).
+        """
+        jd, fr = GNSS.jday_array(times)
+        r_ecef, error = GNSS.propagate_ecef_batch(self.satellites, jd, fr)
+        frame = GNSS.get_receiver_frame(lat, lon, alt)
+        los, elevation = GNSS.line_of_sight_batch(r_ecef, frame)
+        ranges = np.linalg.norm(r_ecef - frame.origin, axis=-1) * 1000
+        if fault is not None and np.ndim(fault) == 1:
+            fault = np.asarray(fault)[:, None]
+        pseudoranges = simulate_pseudoranges(ranges, sigma, fault=fault, rng=rng)
+        return residual_fault_detection(
+            los, elevation > self.elevation_mask, pseudoranges - ranges, sigma, pfa
+        )
+
+    def protection_levels(self, times, lat, lon, alt=0, sigma=PSEUDORANGE_SIGMA,
+                          pfa=PROB_FALSE_ALARM, pmd=PROB_MISSED_DETECTION):
+        """
+        HPL / VPL over many epochs, see protection_levels.
+
+        Returns:
+            tuple: (hpl, vpl, max_slope_sat) arrays of shape (T,); compare
+            hpl with an alert limit such as HAL_RNP_APCH.
+        """
+        los, visible = self.geometry(times, lat, lon, alt)
+        frame = GNSS.get_receiver_frame(lat, lon, alt)
+        return protection_levels(frame.rotate(los), visible, sigma, pfa, pmd)
+
+    def dops(self, times, lat, lon, alt=0):
+        """
+        GDOP / PDOP / HDOP / VDOP / TDOP of the visible set over many epochs.
+
+        Returns:
+            tuple: (gdop, pdop, hdop, vdop, tdop) arrays of shape (T,).
+        """
+        los, visible = self.geometry(times, lat, lon, alt)
+        frame = GNSS.get_receiver_frame(lat, lon, alt)
+        return GNSS.dop_suite(frame.rotate(los), visible)
+
+    def timeline(self, start, end, lat, lon, alt=0, coarse_minutes=10,
+                 precision_seconds=10, flag="fde"):
+        """
+        Outages of one site over a window, see adaptive_timeline.
+        """
+        return adaptive_timeline(
+            lambda times: self.evaluate_batch(times, lat, lon, alt),
+            start, end, coarse_minutes * 60, precision_seconds, flag,
+        )
+
+    def evaluate_batch(self, times, lat, lon, alt=0):
+        """
+        Availability of many epochs in one vectorized pass.
+
+        Parameters:
+            times (list): datetime objects in UTC.
+            lat, lon (float): Receiver position in degrees.
+            alt (float, optional): Receiver height in meters.
+
+        Returns:
+            RaimResult: num_sat, pdop, position, fd and fde are (T,) arrays,
+            visible is the (n_sats, T) visibility mask, worst / best are None.
+        """
+        los, visible = self.geometry(times, lat, lon, alt)
+        return availability_from_geometry(los, visible, self.threshold, times)
+
+
+def availability_from_geometry(los, visible, threshold=PDOP_THRESHOLD, times=None):
+    """
+    Position / RAIM FD / RAIM FDE availability from masked geometry.
+
+    Satellites outside the visibility mask never raise a subset's PDOP, so
+    the worst n-1 and n-2 subsets over the whole catalog are the worst
+    subsets of the visible set.
+
+    Parameters:
+        los (array): (n_sats, ..., 3) line-of-sight unit vectors.
+        visible (array): (n_sats, ...) visibility mask.
+        threshold (float, optional): PDOP threshold. Default is 6.
+        times (optional): Stored in the result's time field.
+
+    Returns:
+        RaimResult: arrays of shape (...), worst / best are None.
+    """
+    engine = SubsetDopEngine(los, visible)
+    num_sat = np.count_nonzero(visible, axis=0)
+    pdop = engine.pdop()
+    worst_x1 = engine.pdop_leave_one_out().max(axis=0)
+    # Pairs with a satellite that is never visible add nothing to the max
+    active = np.flatnonzero(np.reshape(visible, (len(visible), -1)).any(axis=1))
+    pairs = active[subset_indices(len(active), len(active) - 2)]
+    if len(pairs):
+        worst_x2 = engine.pdop_leave_two_out(pairs)[0].max(axis=0)
+    else:
+        worst_x2 = np.full(np.shape(pdop), np.inf)
+    position = (num_sat >= 4) & (pdop < threshold)
+    fd = (num_sat >= 5) & (worst_x1 < threshold)
+    fde = (num_sat >= 6) & (worst_x2 < threshold)
+    return RaimResult(times, num_sat, pdop, position, fd, fde, visible, None, None)
+
+
+def simulate_pseudoranges(ranges, sigma=PSEUDORANGE_SIGMA, clock_bias=0.0, fault=None, rng=None):
+    """
+    Simulate pseudoranges from true geometric ranges.
+
+    Parameters:
+        ranges (array): (n_sats, ...) receiver-satellite ranges in meters.
+        sigma (float, optional): Gaussian noise (1 sigma) in meters.
+        clock_bias (float, optional): Receiver clock bias in meters.
+        fault (array, optional): Extra bias per satellite in meters,
+            broadcastable to ranges (e.g. a step on one satellite).
+        rng (numpy.random.Generator, optional): Random number generator.
+
+    Returns:
+        ndarray: Pseudoranges in meters, same shape as ranges.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    ranges = np.asarray(ranges, dtype=np.float64)
+    pseudoranges = ranges + clock_bias + rng.normal(0.0, sigma, ranges.shape)
+    if fault is not None:
+        pseudoranges = pseudoranges + fault
+    return pseudoranges
+
+
+def exclusion_masks(mask):
+    """
+    Masks with each satellite removed in turn.
+
+    Parameters:
+        mask (array): (n_sats, ...) visibility mask.
+
+    Returns:
+        ndarray: (n_sats, n_sats, ...) masks; [:, i] excludes satellite i.
+        Use with los[:, None] to evaluate every n-1 subset at once.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    keep = ~np.eye(len(mask), dtype=bool)
+    return mask[:, None] & keep.reshape(keep.shape + (1,) * (mask.ndim - 1))
+
+
+def _weighted_normal_matrix(los, mask, shape=()):
+    """
+    Broadcast geometry, weights and G^T W G of a masked least-squares fix.
+
+    Line-of-sight rows of unused satellites are zeroed before G is built,
+    so NaN positions (failed propagation) drop out instead of spreading
+    through 0 * NaN. Where fewer than five satellites are used, G^T W G is
+    replaced by the identity so it can still be inverted.
+
+    Parameters:
+        los (array): (n_sats, ..., 3) line-of-sight unit vectors.
+        mask (array): (n_sats, ...) satellites used in the solution.
+        shape (tuple, optional): Extra shape to broadcast against, e.g. of
+            the prefit residuals.
+
+    Returns:
+        tuple: (G, weight, GTWG, dof, usable) with G of shape (n_sats, ..., 4),
+        weight of shape (n_sats, ...) and dof = n_used - 4.
+    """
+    los = np.asarray(los, dtype=np.float64)
+    shape = np.broadcast_shapes(los.shape[:-1], np.shape(mask), shape)
+    weight = np.broadcast_to(mask, shape).astype(np.float64)
+    G = GNSS.geometry_matrix(np.where(weight[..., None] > 0, np.broadcast_to(los, shape + (3,)), 0.0))
+    GTWG = np.einsum("n...i,n...,n...j->...ij", G, weight, G)
+    dof = np.count_nonzero(weight, axis=0) - 4
+    usable = dof >= 1
+    GTWG = np.where(usable[..., None, None], GTWG, np.eye(4))
+    return G, weight, GTWG, dof, usable
+
+
+def residual_test_statistic(los, mask, prefit, sigma=PSEUDORANGE_SIGMA):
+    """
+    Least-squares residual (chi-square) test statistic.
+
+    Solves position and clock from the prefit residuals of the masked
+    satellites and returns SSE / sigma^2 of the postfit residuals. All
+    leading axes are broadcast, so epochs and subsets (see exclusion_masks)
+    are handled in one call.
+
+    Parameters:
+        los (array): (n_sats, ..., 3) line-of-sight unit vectors.
+        mask (array): (n_sats, ...) satellites used in the solution.
+        prefit (array): (n_sats, ...) pseudorange minus predicted range, meters.
+        sigma (float, optional): Pseudorange error (1 sigma) in meters.
+
+    Returns:
+        tuple: (statistic, dof) arrays of shape (...); dof = n_used - 4 and
+        the statistic is NaN where dof < 1.
+    """
+    G, weight, GTWG, dof, usable = _weighted_normal_matrix(los, mask, np.shape(prefit))
+    y = np.where(weight > 0, np.broadcast_to(prefit, weight.shape), 0.0)
+    GTWy = np.einsum("n...i,n...,n...->...i", G, weight, y)
+    x = np.linalg.solve(GTWG, GTWy[..., None])[..., 0]
+
+    residual = y - np.einsum("n...i,...i->n...", G, x)
+    statistic = np.einsum("n...,n...->...", weight, residual**2) / sigma**2
+    return np.where(usable, statistic, np.nan), dof
+
+
+def detection_threshold(dof, pfa=PROB_FALSE_ALARM):
+    """
+    Chi-square detection threshold on SSE / sigma^2 for the given
+    false-alarm probability; inf where dof < 1 (no redundancy).
+    """
+    dof = np.asarray(dof)
+    return np.where(dof >= 1, chi2.isf(pfa, np.maximum(dof, 1)), np.inf)
+
+
+def residual_fault_detection(los, mask, prefit, sigma=PSEUDORANGE_SIGMA, pfa=PROB_FALSE_ALARM):
+    """
+    Residual-based RAIM fault detection.
+
+    Returns:
+        tuple: (statistic, threshold, detected) arrays of shape (...);
+        detected is False where there is no redundancy to test with.
+    """
+    statistic, dof = residual_test_statistic(los, mask, prefit, sigma)
+    threshold = detection_threshold(dof, pfa)
+    detected = np.where(dof >= 1, statistic > threshold, False)
+    return statistic, threshold, detected
+
+
+@lru_cache(maxsize=256)
+def _pbias_factor(dof, pfa, pmd):
+    """
+    sqrt of the non-centrality at which the chi-square test with dof
+    degrees of freedom misses a bias with probability pmd.
+    """
+    threshold = chi2.isf(pfa, dof)
+    lam = brentq(lambda x: ncx2.cdf(threshold, dof, x) - pmd, 1e-6, 1e4)
+    return np.sqrt(lam)
+
+
+def protection_levels(los_neu, mask, sigma=PSEUDORANGE_SIGMA, pfa=PROB_FALSE_ALARM,
+                      pmd=PROB_MISSED_DETECTION):
+    """
+    Horizontal and vertical protection levels from the least-squares slopes.
+
+    For each satellite the horizontal / vertical slope is the position error
+    per unit of test statistic caused by a bias on that satellite. The
+    protection level is the largest slope times the bias that the residual
+    test detects with missed-detection probability pmd. All leading axes
+    are broadcast, so epochs, locations and subsets go through in one call.
+
+    Parameters:
+        los_neu (array): (n_sats, ..., 3) line-of-sight unit vectors in the
+            receiver's NEU frame (see ReceiverFrame.rotate).
+        mask (array): (n_sats, ...) satellites used in the solution.
+        sigma (float, optional): Pseudorange error (1 sigma) in meters.
+        pfa (float, optional): Probability of false alarm.
+        pmd (float, optional): Probability of missed detection.
+
+    Returns:
+        tuple: (hpl, vpl, max_slope_sat) arrays of shape (...). HPL and VPL
+        are in meters (inf without redundancy); max_slope_sat is the index of
+        the satellite with the largest horizontal slope.
+    """
+    G, weight, GTWG, dof, usable = _weighted_normal_matrix(los_neu, mask)
+    # A = (G^T W G)^-1 G^T W, satellites on the first axis
+    A = np.einsum("...ij,n...j,n...->n...i", np.linalg.inv(GTWG), G, weight)
+    S_diag = 1.0 - np.einsum("n...i,n...i->n...", G, A)
+
+    redundant = (weight > 0) & (S_diag > SubsetDopEngine.SINGULAR_TOL)
+    root_s = np.sqrt(np.where(redundant, S_diag, 1.0))
+    hslope = np.where(redundant, np.hypot(A[..., 0], A[..., 1]) / root_s, 0.0)
+    vslope = np.where(redundant, np.abs(A[..., 2]) / root_s, 0.0)
+    # A satellite used in the fix but not observable by the test is unprotected
+    hslope = np.where((weight > 0) & ~redundant, np.inf, hslope)
+    vslope = np.where((weight > 0) & ~redundant, np.inf, vslope)
+
+    pbias = np.ones(dof.shape)
+    for d in np.unique(dof[usable]):
+        pbias[dof == d] = _pbias_factor(int(d), pfa, pmd)
+    pbias *= sigma
+
+    hpl = np.where(usable, hslope.max(axis=0) * pbias, np.inf)
+    vpl = np.where(usable, vslope.max(axis=0) * pbias, np.inf)
+    return hpl, vpl, np.argmax(hslope, axis=0)
+
+
+def adaptive_timeline(evaluate, start, end, coarse_seconds=600, precision_seconds=10, flag="fde"):
+    """
+    Availability timeline from a coarse sweep refined only at transitions.
+
+    The window is sampled every coarse_seconds. Wherever two neighbouring
+    samples differ in the flag or in the visible set, the interval is
+    bisected (all open intervals in one batched evaluation per round) until
+    it is no wider than precision_seconds. Short outages next to a
+    satellite rising or setting are therefore found even when the flag is
+    the same at both coarse samples. Flag changes caused by PDOP drifting
+    across the threshold and back within one coarse step, with no
+    satellite rising or setting, are not seen.
+
+    Parameters:
+        evaluate (callable): Takes a list of UTC datetimes and returns a
+            RaimResult of arrays, e.g. RaimPredictor.evaluate_batch for a site.
+        start, end (datetime): Window, UTC.
+        coarse_seconds (float, optional): Coarse step. Default is 10 minutes.
+        precision_seconds (float, optional): Bracket width. Default is 10 s.
+        flag (str, optional): RaimResult field the outages refer to.
+
+    Returns:
+        Timeline: outages as (start, end) datetimes, each bound being the
+        first epoch found in the new state (window ends are used when the
+        outage is open); every flag transition bracket; and the number of
+        epochs evaluated.
+    """
+    total = (end - start).total_seconds()
+    t = np.append(np.arange(0.0, total, coarse_seconds), total)
+
+    def run(seconds):
+        result = evaluate([start + timedelta(seconds=float(x)) for x in seconds])
+        visible = np.packbits(np.asarray(result.visible, dtype=bool), axis=0).T
+        return list(zip(np.asarray(getattr(result, flag), dtype=bool), visible))
+
+    def changed(s_left, s_right):
+        return s_left[0] != s_right[0] or np.any(s_left[1] != s_right[1])
+
+    state = run(t)
+    available = np.array([s[0] for s in state])
+    evaluations = len(t)
+    # Open intervals as (left, right, left state, right state); a state is
+    # (flag, packed visible set)
+    intervals = [
+        (t[i], t[i + 1], state[i], state[i + 1])
+        for i in range(len(t) - 1) if changed(state[i], state[i + 1])
+    ]
+    brackets = []
+    while intervals:
+        narrow = [iv for iv in intervals if iv[1] - iv[0] <= precision_seconds]
+        brackets += [iv for iv in narrow if iv[2][0] != iv[3][0]]
+        wide = [iv for iv in intervals if iv[1] - iv[0] > precision_seconds]
+        if not wide:
+            break
+        mids = np.array([(iv[0] + iv[1]) / 2 for iv in wide])
+        mid_state = run(mids)
+        evaluations += len(mids)
+        # The flag may flip more than once inside, so keep every half that
+        # may still hide a change
+        intervals = []
+        for (left, right, s_left, s_right), mid, s_mid in zip(wide, mids, mid_state):
+            if changed(s_left, s_mid):
+                intervals.append((left, mid, s_left, s_mid))
+            if changed(s_mid, s_right):
+                intervals.append((mid, right, s_mid, s_right))
+    brackets = [(left, right, s_left[0], s_right[0]) for left, right, s_left, s_right in brackets]
+    brackets.sort(key=lambda iv: iv[0])
+
+    outages = []
+    outage_start = None if available[0] else start
+    for left, right, a_left, a_right in brackets:
+        if a_left and not a_right:
+            outage_start = start + timedelta(seconds=float(right))
+        elif not a_left and a_right and outage_start is not None:
+            outages.append((outage_start, start + timedelta(seconds=float(right))))
+            outage_start = None
+    if outage_start is not None:
+        outages.append((outage_start, end))
+
+    transitions = [
+        (start + timedelta(seconds=float(left)), start + timedelta(seconds=float(right)))
+        for left, right, a_left, a_right in brackets
+    ]
+    return Timeline(outages, transitions, evaluations)
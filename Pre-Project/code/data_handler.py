@@ -1,4 +1,5 @@
 import Library_GNSS as GNSS
+import numpy as np
 
 def compute_satellite_data(year, month, day, hour, minute, second, origin_lat, origin_lon, origin_alt):
     tle_file_path = "F:\\Project_RAIM\\Pre-Project\\data\\TLE.txt"
@@ -10,18 +11,14 @@ def compute_satellite_data(year, month, day, hour, minute, second, origin_lat, o
         day -= 1
 
     ecef_list = GNSS.compute_ecef_positions(tle_file_path, year, month, day, hour_utc, minute, second)
-    neu_list = GNSS.compute_neu_positions(ecef_list, origin_lat, origin_lon, origin_alt)
-    az_el_list = GNSS.compute_azel_positions(neu_list)
-    sat_in_view = GNSS.find_sat_in_view(az_el_list)
-    print(sat_in_view)
-    sat_in_view_ECEF = GNSS.Az_El_to_ECEF(sat_in_view, origin_lat, origin_lon, origin_alt)
-    sat_total = GNSS.find_sat_total(az_el_list)
-    pdop = GNSS.cal_pdop(sat_in_view_ECEF, GNSS.latlon_to_ecef(origin_lat, origin_lon, origin_alt))
-    
-    return pdop, len(sat_in_view), len(sat_total)
+    r_ecef = np.array([row[1:4] for row in ecef_list], dtype=np.float64)
+    pdop, in_view = GNSS.compute_visible_pdop(r_ecef, origin_lat, origin_lon, origin_alt)
+
+    return float(pdop), int(np.count_nonzero(in_view)), len(ecef_list)
 
 # Example usage:
 # compute_satellite_data(2024, 12, 12, 19, 20, 0, 13.683529, 100.619786, 0)
 
-pdop, sat_view, sat_tot = compute_satellite_data(2024, 12, 22, 19, 25, 0, 13.683529, 100.619786, 0)
+if __name__ == "__main__":
+    pdop, sat_view, sat_tot = compute_satellite_data(2024, 12, 22, 19, 25, 0, 13.683529, 100.619786, 0)
 
@@ -0,0 +1,339 @@
+import json
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing.shared_memory import SharedMemory
+import Library_GNSS as GNSS
+import Library_RAIM as RAIM
+
+
+# One grid cell at one epoch
+GRID_DTYPE = np.dtype([("pdop", "<f4"), ("num_sat", "u1"), ("flags", "u1")])
+
+# Bits of the flags field
+FLAG_POSITION = 1
+FLAG_FD = 2
+FLAG_FDE = 4
+
+GRID_MAGIC = b"RAIMGRID"
+# Data starts on a multiple of this many bytes
+GRID_ALIGN = 64
+
+# Latitude rows of the grid handed to a worker at a time
+WORKER_ROWS = 4
+
+# Epochs handed to iter_grid_chunks at a time by coverage_statistics
+COVERAGE_BATCH_EPOCHS = 1440
+
+# Per-process state of the pool workers, set by _init_worker
+_worker_state = {}
+
+
+def grid_axes(lat_min, lat_max, lon_min, lon_max, step_deg):
+    """
+    Latitude and longitude axes of a regular grid, both ends included.
+    """
+    lats = lat_min + step_deg * np.arange(int(round((lat_max - lat_min) / step_deg)) + 1)
+    lons = lon_min + step_deg * np.arange(int(round((lon_max - lon_min) / step_deg)) + 1)
+    return lats, lons
+
+
+def grid_records(los, visible, threshold=RAIM.PDOP_THRESHOLD):
+    """
+    Pack availability of masked geometry into GRID_DTYPE records.
+
+    Parameters:
+        los (array): (n_sats, ..., 3) line-of-sight unit vectors.
+        visible (array): (n_sats, ...) visibility mask.
+
+    Returns:
+        ndarray: GRID_DTYPE records of shape (...).
+    """
+    result = RAIM.availability_from_geometry(los, visible, threshold)
+    records = np.empty(result.pdop.shape, dtype=GRID_DTYPE)
+    records["pdop"] = result.pdop
+    records["num_sat"] = result.num_sat
+    records["flags"] = (
+        result.position * FLAG_POSITION + result.fd * FLAG_FD + result.fde * FLAG_FDE
+    )
+    return records
+
+
+def iter_grid_chunks(predictor, lats, lons, times, chunk_epochs=1):
+    """
+    Availability of every grid cell, produced a few epochs at a time.
+
+    The constellation is propagated per chunk of epochs and every cell of
+    the chunk is evaluated in one vectorized pass.
+
+    Parameters:
+        predictor (RaimPredictor): Catalog, elevation mask and PDOP threshold.
+        lats, lons (array): Grid axes in degrees.
+        times (list): Epochs in UTC.
+        chunk_epochs (int, optional): Epochs per chunk. Default is 1.
+
+    Yields:
+        tuple: (start index, records) with records of shape
+        (n_epochs_in_chunk, n_lat, n_lon).
+    """
+    lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+    frame = GNSS.ReceiverFrame(lat_grid.ravel(), lon_grid.ravel(), np.zeros(lat_grid.size))
+    jd, fr = GNSS.jday_array(times)
+    for start in range(0, len(times), chunk_epochs):
+        stop = min(start + chunk_epochs, len(times))
+        r_ecef, error = GNSS.propagate_ecef_batch(predictor.satellites, jd[start:stop], fr[start:stop])
+        # (n_sats, T, 1, 3) against (L, 3) receivers
+        los, elevation = GNSS.line_of_sight_batch(r_ecef[:, :, None, :], frame)
+        records = grid_records(los, elevation > predictor.elevation_mask, predictor.threshold)
+        yield start, records.reshape(stop - start, len(lats), len(lons))
+
+
+def create_grid_file(path, header, shape):
+    """
+    Write the header of a grid file and return a writable memmap of its data.
+    """
+    header = dict(header, shape=list(shape), dtype=GRID_DTYPE.descr)
+    text = json.dumps(header).encode("utf-8")
+    offset = len(GRID_MAGIC) + 4 + len(text)
+    padding = -offset % GRID_ALIGN
+    with open(path, "wb") as file:
+        file.write(GRID_MAGIC)
+        file.write(np.uint32(len(text) + padding).tobytes())
+        file.write(text + b" " * padding)
+    return np.memmap(path, dtype=GRID_DTYPE, mode="r+", offset=offset + padding, shape=tuple(shape))
+
+
+def open_grid(path, mode="r"):
+    """
+    Open a grid file without loading it.
+
+    Returns:
+        tuple: (header, data) where header is the dict of axes and settings
+        and data is a (n_times, n_lat, n_lon) memmap of GRID_DTYPE records.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(GRID_MAGIC)) != GRID_MAGIC:
+            raise ValueError(f"{path} is not a RAIM grid file")
+        length = int(np.frombuffer(file.read(4), dtype=np.uint32)[0])
+        header = json.loads(file.read(length).decode("utf-8"))
+    offset = len(GRID_MAGIC) + 4 + length
+    data = np.memmap(path, dtype=GRID_DTYPE, mode=mode, offset=offset, shape=tuple(header["shape"]))
+    return header, data
+
+
+def grid_index(header, lat, lon, time):
+    """
+    (time, lat, lon) indices of the cell and epoch nearest to a query.
+    """
+    start = datetime.fromisoformat(header["start"])
+    t = int(round((time - start).total_seconds() / header["step_seconds"]))
+    i = int(round((lat - header["lat_start"]) / header["step_deg"]))
+    j = int(round((lon - header["lon_start"]) / header["step_deg"]))
+    n_times, n_lat, n_lon = header["shape"]
+    if not (0 <= t < n_times and 0 <= i < n_lat and 0 <= j < n_lon):
+        raise ValueError("Query is outside the prediction grid")
+    return t, i, j
+
+
+def query_grid(header, data, lat, lon, time):
+    """
+    Record of one cell at one epoch, read straight from the memmap.
+    """
+    return data[grid_index(header, lat, lon, time)]
+
+
+def _init_worker(ephemeris_name, ephemeris_shape, path, elevation_mask, threshold):
+    """
+    Attach a pool worker to the shared ephemeris and the grid file.
+    """
+    shm = SharedMemory(name=ephemeris_name)
+    _worker_state["shm"] = shm
+    _worker_state["ephemeris"] = np.ndarray(ephemeris_shape, dtype=np.float64, buffer=shm.buf)
+    _worker_state["header"], _worker_state["data"] = open_grid(path, mode="r+")
+    _worker_state["elevation_mask"] = elevation_mask
+    _worker_state["threshold"] = threshold
+
+
+def _grid_rows_worker(rows):
+    """
+    Fill latitude rows [start, stop) of the grid file for every epoch.
+    """
+    start, stop, lats, lons = rows
+    r_ecef = _worker_state["ephemeris"]
+    data = _worker_state["data"]
+    lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+    frame = GNSS.ReceiverFrame(lat_grid.ravel(), lon_grid.ravel(), np.zeros(lat_grid.size))
+    for t in range(r_ecef.shape[1]):
+        los, elevation = GNSS.line_of_sight_batch(r_ecef[:, t, None, :], frame)
+        records = grid_records(los, elevation > _worker_state["elevation_mask"], _worker_state["threshold"])
+        data[t, start:stop] = records.reshape(len(lats), len(lons))
+    data.flush()
+    return start, stop
+
+
+def fill_grid_parallel(predictor, path, lats, lons, times, workers=None):
+    """
+    Fill a grid file with a process pool sharing one propagated ephemeris.
+
+    The constellation is propagated once for all epochs and published via
+    multiprocessing.shared_memory; workers attach to it without copying,
+    compute visibility and availability for their block of latitude rows
+    and write it straight into the memory-mapped grid file. On platforms
+    that spawn processes (Windows) call this from under
+    if __name__ == "__main__".
+
+    Parameters:
+        predictor (RaimPredictor): Catalog, elevation mask and PDOP threshold.
+        path (str): Grid file made by create_grid_file.
+        lats, lons (array): Grid axes in degrees.
+        times (list): Epochs in UTC.
+        workers (int, optional): Number of processes. Default is os.cpu_count().
+    """
+    jd, fr = GNSS.jday_array(times)
+    r_ecef, error = GNSS.propagate_ecef_batch(predictor.satellites, jd, fr)
+    shm = SharedMemory(create=True, size=r_ecef.nbytes)
+    try:
+        shared = np.ndarray(r_ecef.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = r_ecef
+        blocks = [
+            (i, min(i + WORKER_ROWS, len(lats)), lats[i:i + WORKER_ROWS], lons)
+            for i in range(0, len(lats), WORKER_ROWS)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(shm.name, r_ecef.shape, path, predictor.elevation_mask, predictor.threshold),
+        ) as pool:
+            list(pool.map(_grid_rows_worker, blocks))
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def predict_grid(predictor, path, lat_min, lat_max, lon_min, lon_max, start, hours,
+                 step_deg=0.5, step_minutes=5, workers=1):
+    """
+    NOTAM-style regional RAIM prediction written to a memory-mapped file.
+
+    Every cell of a lat/lon grid gets PDOP, the number of visible
+    satellites and position / FD / FDE availability flags for every epoch
+    of the window. Results are written epoch by epoch, so the cube is
+    never held in memory.
+
+    Parameters:
+        predictor (RaimPredictor): Catalog, elevation mask and PDOP threshold.
+        path (str): Output file.
+        lat_min, lat_max, lon_min, lon_max (float): Region in degrees.
+        start (datetime): Start of the window, UTC.
+        hours (float): Length of the window in hours.
+        step_deg (float, optional): Grid spacing in degrees. Default is 0.5.
+        step_minutes (float, optional): Time step in minutes. Default is 5.
+        workers (int, optional): Processes to use; more than one (or None for
+            all cores) runs fill_grid_parallel. Default is 1.
+
+    Returns:
+        tuple: (header, data) as open_grid.
+    """
+    lats, lons = grid_axes(lat_min, lat_max, lon_min, lon_max, step_deg)
+    n_times = int(hours * 60 / step_minutes) + 1
+    times = [start + timedelta(minutes=step_minutes * k) for k in range(n_times)]
+    header = {
+        "start": start.isoformat(),
+        "step_seconds": step_minutes * 60.0,
+        "lat_start": float(lats[0]),
+        "lon_start": float(lons[0]),
+        "step_deg": step_deg,
+        "elevation_mask": predictor.elevation_mask,
+        "threshold": predictor.threshold,
+        "flags": {"position": FLAG_POSITION, "fd": FLAG_FD, "fde": FLAG_FDE},
+    }
+    data = create_grid_file(path, header, (n_times, len(lats), len(lons)))
+    if workers == 1:
+        for index, records in iter_grid_chunks(predictor, lats, lons, times):
+            data[index:index + len(records)] = records
+        data.flush()
+    del data
+    if workers != 1:
+        fill_grid_parallel(predictor, path, lats, lons, times, workers)
+    return open_grid(path)
+
+
+class CoverageReducer:
+    """
+    Streaming coverage statistics per grid cell.
+
+    Consumes availability records epoch chunk by epoch chunk and keeps only
+    running accumulators, so memory does not grow with the length of the
+    study.
+
+    Parameters:
+        shape (tuple): Shape of the cell axes, e.g. (n_lat, n_lon).
+        flag (int, optional): Availability bit to track. Default is FLAG_FDE.
+    """
+
+    def __init__(self, shape, flag=FLAG_FDE):
+        self.flag = flag
+        self.epochs = 0
+        self.available = np.zeros(shape, dtype=np.int64)
+        self.worst_pdop = np.zeros(shape, dtype=np.float32)
+        self.current_outage = np.zeros(shape, dtype=np.int64)
+        self.longest_outage = np.zeros(shape, dtype=np.int64)
+
+    def update(self, records):
+        """
+        Add a chunk of GRID_DTYPE records of shape (n_epochs, *shape).
+        """
+        ok = (records["flags"] & self.flag) > 0
+        self.epochs += len(records)
+        self.available += np.count_nonzero(ok, axis=0)
+        np.maximum(self.worst_pdop, records["pdop"].max(axis=0), out=self.worst_pdop)
+        for epoch_ok in ok:
+            self.current_outage = np.where(epoch_ok, 0, self.current_outage + 1)
+            np.maximum(self.longest_outage, self.current_outage, out=self.longest_outage)
+
+    def percent_available(self):
+        """
+        Percentage of epochs with the tracked availability, per cell.
+        """
+        return 100.0 * self.available / max(self.epochs, 1)
+
+
+def coverage_statistics(predictor, lat_min, lat_max, lon_min, lon_max, start, hours,
+                        step_deg=0.5, step_minutes=5, flag=FLAG_FDE):
+    """
+    Coverage statistics of a region over a long window in bounded memory.
+
+    Epochs are evaluated one chunk at a time (iter_grid_chunks) and folded
+    into a CoverageReducer; the location x time cube is never stored.
+
+    Parameters:
+        predictor (RaimPredictor): Catalog, elevation mask and PDOP threshold.
+        lat_min, lat_max, lon_min, lon_max (float): Region in degrees.
+        start (datetime): Start of the window, UTC.
+        hours (float): Length of the window in hours.
+        step_deg (float, optional): Grid spacing in degrees. Default is 0.5.
+        step_minutes (float, optional): Time step in minutes. Default is 5.
+        flag (int, optional): Availability bit to track. Default is FLAG_FDE.
+
+    Returns:
+        tuple: (lats, lons, percent_available, worst_pdop, longest_outage_minutes)
+        with the statistics as (n_lat, n_lon) arrays.
+    """
+    lats, lons = grid_axes(lat_min, lat_max, lon_min, lon_max, step_deg)
+    n_times = int(hours * 60 / step_minutes) + 1
+    reducer = CoverageReducer((len(lats), len(lons)), flag)
+    # Only one batch of epochs exists as datetimes at a time
+    for first in range(0, n_times, COVERAGE_BATCH_EPOCHS):
+        last = min(first + COVERAGE_BATCH_EPOCHS, n_times)
+        times = [start + timedelta(minutes=step_minutes * k) for k in range(first, last)]
+        for index, records in iter_grid_chunks(predictor, lats, lons, times):
+            reducer.update(records)
+    return (
+        lats,
+        lons,
+        reducer.percent_available(),
+        reducer.worst_pdop,
+        reducer.longest_outage * step_minutes,
+    )
@@ -2,7 +2,8 @@ import folium
 import csv
 import math
 from datetime import datetime, timedelta
-import data_handler as dh
+import Library_RAIM as RAIM
+import route_handler as rh
 
 # Function to calculate the distance between two points given their coordinates
 def calculate_distance(start, end):
@@ -59,21 +60,23 @@ def create_map(waypoints, map_center, map_zoom):
     return map_waypoint
 
 # Function to add arrival time and satellite data to map markers
-def add_marker_data(map_waypoint, waypoints, arrival_times):
+def add_marker_data(map_waypoint, waypoints, arrival_times, predictor):
+    # Convert UTC+7 to UTC and evaluate every waypoint at once
+    utc_times = [arrival_time - timedelta(hours=7) for arrival_time in arrival_times]
+    result = rh.evaluate_route(predictor, waypoints, utc_times)
+    sat_tot = len(predictor.satellites)
     for i in range(len(waypoints) - 1):
         start = waypoints[i][1], waypoints[i][2]
         distance = calculate_distance(start, waypoints[i + 1][1:3])
         arrival_time = arrival_times[i].strftime("%Y-%m-%d %H:%M:%S")
-        year, month, day, hour, minute, second = arrival_times[i].timetuple()[:6]
-        pdop, sat_view, sat_tot = dh.compute_satellite_data(year, month, day, hour, minute, second, start[0], start[1], 0)
+        pdop, sat_view = result.pdop[i], result.num_sat[i]
         popup_content = f"{waypoints[i][0]}<br>Distance to next point: {distance:.2f} km<br>Arrival time: {arrival_time}<br>Predicted PDOP: {pdop:.5f}<br>Number of satellites in view: {sat_view}<br>Total number of satellites: {sat_tot}"
         popup = folium.Popup(popup_content, max_width=300)
         folium.Marker(location=start, popup=popup).add_to(map_waypoint)
     # Handle the last waypoint separately
     last_waypoint = waypoints[-1]
     arrival_time = arrival_times[-1].strftime("%Y-%m-%d %H:%M:%S")
-    year, month, day, hour, minute, second = arrival_times[-1].timetuple()[:6]
-    pdop, sat_view, sat_tot = dh.compute_satellite_data(year, month, day, hour, minute, second, last_waypoint[1], last_waypoint[2], 0)
+    pdop, sat_view = result.pdop[-1], result.num_sat[-1]
     popup_content = f"{last_waypoint[0]}<br>Arrival time: {arrival_time}<br>Predicted PDOP: {pdop:.5f}<br>Number of satellites in view: {sat_view}<br>Total number of satellites: {sat_tot}"
     popup = folium.Popup(popup_content, max_width=300)
     folium.Marker(location=(last_waypoint[1], last_waypoint[2]), popup=popup).add_to(map_waypoint)
@@ -94,7 +97,8 @@ def main():
     arrival_times = predict_arrival_times(waypoints, speed_kmh, start_time)
     
     # Add marker data
-    add_marker_data(map_waypoint, waypoints, arrival_times)
+    predictor = RAIM.RaimPredictor("F:\\Project_RAIM\\Pre-Project\\data\\TLE.txt")
+    add_marker_data(map_waypoint, waypoints, arrival_times, predictor)
     
     map_waypoint.show_in_browser()
 
@@ -0,0 +1,123 @@
+import csv
+import re
+import numpy as np
+from collections import namedtuple
+from datetime import datetime
+import Library_RAIM as RAIM
+
+
+# mask is a satellite_bitmask over the catalog; start / end are UTC
+# datetimes, None for an outage that is open on that side
+Outage = namedtuple("Outage", ["mask", "start", "end"])
+
+# A named set of outages, e.g. one NANU batch or "PRN 13 fails"
+OutageScenario = namedtuple("OutageScenario", ["name", "outages"])
+
+# "GPS BIIR-2  (PRN 13)" -> 13
+PRN_PATTERN = re.compile(r"PRN\s*(\d+)")
+
+
+def satellite_index(names, satellite):
+    """
+    Catalog index of a satellite given as "PRN 13", "13" or its full TLE name.
+    """
+    if satellite in names:
+        return names.index(satellite)
+    match = PRN_PATTERN.search(satellite)
+    prn = int(match.group(1)) if match else int(satellite)
+    for i, name in enumerate(names):
+        match = PRN_PATTERN.search(name)
+        if match and int(match.group(1)) == prn:
+            return i
+    raise ValueError(f"Satellite {satellite} is not in the catalog")
+
+
+def read_outage_file(filename, names):
+    """
+    Read outage scenarios from a local CSV file.
+
+    The file has the columns scenario, satellite, start and end, one row per
+    satellite outage (e.g. copied from NANU notices). start and end are UTC
+    "YYYY-MM-DD HH:MM:SS" and may be left empty for an open-ended outage.
+    Rows of one scenario that share a window are merged into one bitmask.
+
+    Parameters:
+        filename (str): Path to the outage file.
+        names (list): Satellite names in catalog order (read_tle_file).
+
+    Returns:
+        list: OutageScenario tuples in file order.
+    """
+    scenarios = {}
+    with open(filename, mode="r") as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            start = datetime.fromisoformat(row["start"]) if row.get("start") else None
+            end = datetime.fromisoformat(row["end"]) if row.get("end") else None
+            windows = scenarios.setdefault(row["scenario"], {})
+            bit = 1 << satellite_index(names, row["satellite"].strip())
+            windows[start, end] = windows.get((start, end), 0) | bit
+    return [
+        OutageScenario(name, [Outage(mask, start, end) for (start, end), mask in windows.items()])
+        for name, windows in scenarios.items()
+    ]
+
+
+def single_failure_scenarios(names):
+    """
+    The nominal constellation followed by one scenario per failed satellite.
+    """
+    scenarios = [OutageScenario("nominal", [])]
+    for i, name in enumerate(names):
+        scenarios.append(OutageScenario(name, [Outage(1 << i, None, None)]))
+    return scenarios
+
+
+def scenario_masks(scenarios, num_sat, times):
+    """
+    Satellites out of service in each scenario at each epoch.
+
+    Parameters:
+        scenarios (list): OutageScenario tuples.
+        num_sat (int): Catalog size.
+        times (list): datetime objects in UTC.
+
+    Returns:
+        ndarray: (n_scenarios, n_sats, T) boolean array, True when excluded.
+    """
+    times = np.array(times, dtype="datetime64[us]")
+    excluded = np.zeros((len(scenarios), num_sat, len(times)), dtype=bool)
+    for s, scenario in enumerate(scenarios):
+        for outage in scenario.outages:
+            active = np.ones(len(times), dtype=bool)
+            if outage.start is not None:
+                active &= times >= np.datetime64(outage.start, "us")
+            if outage.end is not None:
+                active &= times < np.datetime64(outage.end, "us")
+            excluded[s] |= RAIM.bitmask_to_array(outage.mask, num_sat)[:, None] & active
+    return excluded
+
+
+def scenario_availability(predictor, scenarios, times, lat, lon, alt=0):
+    """
+    DOP and RAIM availability of every outage scenario at once.
+
+    The geometry is propagated once; each scenario only masks satellites out
+    of the visible set, and all scenarios and epochs go through one
+    availability_from_geometry call.
+
+    Parameters:
+        predictor (RaimPredictor): Catalog, elevation mask and PDOP threshold.
+        scenarios (list): OutageScenario tuples.
+        times (list): datetime objects in UTC.
+        lat, lon (float): Receiver position in degrees.
+        alt (float, optional): Receiver height in meters.
+
+    Returns:
+        RaimResult: arrays of shape (n_scenarios, T); visible is the
+        (n_sats, n_scenarios, T) mask after the outages.
+    """
+    los, visible = predictor.geometry(times, lat, lon, alt)
+    excluded = scenario_masks(scenarios, len(predictor.satellites), times)
+    visible = visible[:, None] & ~np.swapaxes(excluded, 0, 1)
+    return RAIM.availability_from_geometry(los[:, None], visible, predictor.threshold, times)
@@ -0,0 +1,263 @@
+import numpy as np
+from collections import namedtuple
+from datetime import timedelta
+import Library_GNSS as GNSS
+import Library_RAIM as RAIM
+
+
+# Same spherical Earth radius as map_demo.calculate_distance, in km
+EARTH_RADIUS_KM = 6371.0
+
+# Result of sweep_departures: per-departure RaimResult fields are (n_departures, n_waypoints)
+DepartureSweep = namedtuple("DepartureSweep", ["departures", "result", "clear"])
+
+
+def great_circle_distance(lat1, lon1, lat2, lon2):
+    """
+    Vectorized haversine distance in kilometers (as map_demo.calculate_distance).
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def _route_legs(waypoints):
+    """
+    Unit vectors of the waypoints on the sphere and the length of each leg in km.
+    """
+    lat = np.radians([waypoint[1] for waypoint in waypoints])
+    lon = np.radians([waypoint[2] for waypoint in waypoints])
+    p = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], -1)
+    leg_km = great_circle_distance(
+        np.degrees(lat[:-1]), np.degrees(lon[:-1]), np.degrees(lat[1:]), np.degrees(lon[1:])
+    )
+    return p, leg_km
+
+
+def _along_legs(p, leg_km, leg, frac):
+    """
+    Latitude and longitude at fraction frac of each given leg, by spherical
+    linear interpolation between the leg end points.
+    """
+    omega = leg_km[leg] / EARTH_RADIUS_KM
+    sin_omega = np.sin(omega)
+    safe = sin_omega > 1e-12
+    w0 = np.where(safe, np.sin((1 - frac) * omega) / np.where(safe, sin_omega, 1.0), 1 - frac)
+    w1 = np.where(safe, np.sin(frac * omega) / np.where(safe, sin_omega, 1.0), frac)
+    q = w0[:, None] * p[leg] + w1[:, None] * p[leg + 1]
+    q /= np.linalg.norm(q, axis=-1, keepdims=True)
+    lat = np.degrees(np.arcsin(np.clip(q[:, 2], -1.0, 1.0)))
+    lon = np.degrees(np.arctan2(q[:, 1], q[:, 0]))
+    return lat, lon
+
+
+def route_positions_at(waypoints, speed_kmh, start_time, times):
+    """
+    Aircraft position along the route at arbitrary times.
+
+    Parameters:
+        waypoints (list): (name, latitude, longitude) tuples.
+        speed_kmh (float): Ground speed in km/h.
+        start_time (datetime): Time at the first waypoint.
+        times (list): Query times; clamped to the first / last waypoint.
+
+    Returns:
+        tuple: (lat, lon) arrays in degrees.
+    """
+    if len(waypoints) < 2:
+        return np.full(len(times), float(waypoints[0][1])), np.full(len(times), float(waypoints[0][2]))
+    p, leg_km = _route_legs(waypoints)
+    cumulative = np.concatenate([[0.0], np.cumsum(leg_km)])
+    hours = np.array([(t - start_time).total_seconds() / 3600.0 for t in times])
+    distance = np.clip(hours * speed_kmh, 0.0, cumulative[-1])
+    leg = np.clip(np.searchsorted(cumulative, distance, side="right") - 1, 0, len(leg_km) - 1)
+    frac = np.where(leg_km[leg] > 0, (distance - cumulative[leg]) / np.where(leg_km[leg] > 0, leg_km[leg], 1.0), 0.0)
+    return _along_legs(p, leg_km, leg, np.clip(frac, 0.0, 1.0))
+
+
+def densify_route(waypoints, speed_kmh, start_time, step_km=None, step_minutes=None):
+    """
+    Sample every leg of a route along the great circle.
+
+    Each leg is split into equal parts no longer than the requested step
+    (in distance or in flight time at speed_kmh); the filed waypoints are
+    always kept. Positions, cumulative distances and ETAs are computed with
+    NumPy for all samples at once.
+
+    Parameters:
+        waypoints (list): (name, latitude, longitude) tuples, as read_waypoints.
+        speed_kmh (float): Ground speed in km/h.
+        start_time (datetime): Time at the first waypoint.
+        step_km (float, optional): Maximum distance between samples.
+        step_minutes (float, optional): Maximum flight time between samples.
+            Default is 1 minute when neither step is given.
+
+    Returns:
+        tuple: (samples, distances, arrival_times) where samples is a list of
+        (name, latitude, longitude) tuples (generated points are named
+        "<leg start>+<n>"), distances is the cumulative distance in km and
+        arrival_times is the list of ETAs.
+    """
+    if step_km is None:
+        step_km = speed_kmh * (1.0 if step_minutes is None else step_minutes) / 60.0
+    elif step_minutes is not None:
+        step_km = min(step_km, speed_kmh * step_minutes / 60.0)
+
+    if len(waypoints) < 2:
+        # No legs: the route is its only waypoint, reached at departure
+        samples = [tuple(waypoint[:3]) for waypoint in waypoints]
+        return samples, np.zeros(len(samples)), [start_time] * len(samples)
+
+    names = [waypoint[0] for waypoint in waypoints]
+    p, leg_km = _route_legs(waypoints)
+    parts = np.maximum(np.ceil(leg_km / step_km).astype(np.intp), 1)
+
+    # Leg index and fraction along the leg for every sample
+    leg = np.repeat(np.arange(len(parts)), parts)
+    offset = np.arange(len(leg)) - np.repeat(np.cumsum(parts) - parts, parts)
+    frac = offset / parts[leg]
+    leg = np.append(leg, len(parts) - 1)
+    offset = np.append(offset, parts[-1])
+    frac = np.append(frac, 1.0)
+
+    sample_lat, sample_lon = _along_legs(p, leg_km, leg, frac)
+
+    distances = np.concatenate([[0.0], np.cumsum(leg_km)])[leg] + frac * leg_km[leg]
+    hours = distances / speed_kmh
+    arrival_times = [start_time + timedelta(hours=float(h)) for h in hours]
+
+    samples = []
+    for i in range(len(leg)):
+        if offset[i] == 0:
+            samples.append(tuple(waypoints[leg[i]][:3]))
+        elif frac[i] == 1.0:
+            samples.append(tuple(waypoints[leg[i] + 1][:3]))
+        else:
+            name = f"{names[leg[i]]}+{offset[i]}"
+            samples.append((name, float(sample_lat[i]), float(sample_lon[i])))
+    return samples, distances, arrival_times
+
+
+def evaluate_route(predictor, waypoints, arrival_times, alt=0):
+    """
+    Visibility, PDOP and RAIM availability at every waypoint in one pass.
+
+    The constellation is propagated once for the set of arrival epochs and
+    all waypoints are evaluated together, each in its own receiver frame.
+
+    Parameters:
+        predictor (RaimPredictor): Catalog, elevation mask and PDOP threshold.
+        waypoints (list): (name, latitude, longitude) tuples, as read_waypoints.
+        arrival_times (list): Arrival time at each waypoint, UTC.
+        alt (float, optional): Receiver height in meters. Default is 0.
+
+    Returns:
+        RaimResult: num_sat, pdop, position, fd and fde are (n_waypoints,)
+        arrays and visible is the (n_sats, n_waypoints) visibility mask.
+    """
+    lats = np.array([waypoint[1] for waypoint in waypoints], dtype=np.float64)
+    lons = np.array([waypoint[2] for waypoint in waypoints], dtype=np.float64)
+    frame = GNSS.ReceiverFrame(lats, lons, np.full(len(waypoints), float(alt)))
+
+    jd, fr = GNSS.jday_array(arrival_times)
+    epochs, index = np.unique(np.stack([jd, fr], -1), axis=0, return_inverse=True)
+    r_ecef, error = GNSS.propagate_ecef_batch(predictor.satellites, epochs[:, 0], epochs[:, 1])
+    r_ecef = r_ecef[:, index.ravel()]
+
+    los, elevation = GNSS.line_of_sight_batch(r_ecef, frame)
+    visible = elevation > predictor.elevation_mask
+    return RAIM.availability_from_geometry(los, visible, predictor.threshold, arrival_times)
+
+
+def evaluate_route_densified(predictor, waypoints, speed_kmh, start_time, step_km=None,
+                             step_minutes=None, alt=0):
+    """
+    Densify a route (see densify_route) and evaluate every sample at once.
+
+    Parameters:
+        start_time (datetime): Time at the first waypoint, UTC.
+
+    Returns:
+        tuple: (samples, distances, arrival_times, result) with result the
+        RaimResult of evaluate_route for the samples.
+    """
+    samples, distances, arrival_times = densify_route(
+        waypoints, speed_kmh, start_time, step_km, step_minutes
+    )
+    result = evaluate_route(predictor, samples, arrival_times, alt)
+    return samples, distances, arrival_times, result
+
+
+def route_timeline(predictor, waypoints, speed_kmh, start_time, coarse_minutes=10,
+                   precision_seconds=10, flag="fde", alt=0):
+    """
+    Outages along a route from an adaptive sweep (see Library_RAIM.adaptive_timeline).
+
+    Parameters:
+        start_time (datetime): Time at the first waypoint, UTC.
+
+    Returns:
+        Timeline: outages, transition brackets and number of evaluations.
+    """
+    p, leg_km = _route_legs(waypoints)
+    end_time = start_time + timedelta(hours=float(np.sum(leg_km)) / speed_kmh)
+
+    def evaluate(times):
+        lat, lon = route_positions_at(waypoints, speed_kmh, start_time, times)
+        samples = [("", la, lo) for la, lo in zip(lat, lon)]
+        return evaluate_route(predictor, samples, times, alt)
+
+    return RAIM.adaptive_timeline(
+        evaluate, start_time, end_time, coarse_minutes * 60, precision_seconds, flag
+    )
+
+
+def sweep_departures(predictor, waypoints, arrival_times, departures, alt=0, flag="fde"):
+    """
+    RAIM availability along a route for every candidate departure time.
+
+    The ETA vector of the route (e.g. from predict_arrival_times or
+    densify_route) is shifted to each departure. The catalog is propagated
+    once for the union of all shifted epochs and every (departure, waypoint)
+    pair is evaluated in a single batched computation.
+
+    Parameters:
+        predictor (RaimPredictor): Catalog, elevation mask and PDOP threshold.
+        waypoints (list): (name, latitude, longitude) tuples.
+        arrival_times (list): ETA at each waypoint for any reference departure, UTC.
+        departures (list): Candidate departure times (time at the first waypoint), UTC.
+        alt (float, optional): Receiver height in meters. Default is 0.
+        flag (str, optional): RaimResult field a departure must hold at every
+            waypoint to be clear ("position", "fd" or "fde"). Default is "fde".
+
+    Returns:
+        DepartureSweep: departures, the RaimResult with (n_departures,
+        n_waypoints) arrays (time holds the shifted ETAs as datetime64) and
+        clear, the (n_departures,) mask of departures without RAIM holes.
+    """
+    offsets = np.array(arrival_times, dtype="datetime64[us]")
+    offsets = (offsets - offsets[0]).astype(np.int64)
+    start = np.array(departures, dtype="datetime64[us]")
+    etas = start[:, None] + offsets.astype("timedelta64[us]")
+
+    # Union of all epochs, relative to the first departure in microseconds
+    elapsed = (etas - start[0]).astype(np.int64)
+    epochs, index = np.unique(elapsed, return_inverse=True)
+    jd0, fr0 = GNSS.jday_array([departures[0]])
+    jd = np.full(len(epochs), jd0[0])
+    fr = fr0[0] + epochs / 86400e6
+    r_ecef, error = GNSS.propagate_ecef_batch(predictor.satellites, jd, fr)
+    r_ecef = r_ecef[:, index.reshape(etas.shape)]
+
+    lats = np.array([waypoint[1] for waypoint in waypoints], dtype=np.float64)
+    lons = np.array([waypoint[2] for waypoint in waypoints], dtype=np.float64)
+    shape = etas.shape
+    frame = GNSS.ReceiverFrame(
+        np.broadcast_to(lats, shape), np.broadcast_to(lons, shape), np.full(shape, float(alt))
+    )
+
+    los, elevation = GNSS.line_of_sight_batch(r_ecef, frame)
+    visible = elevation > predictor.elevation_mask
+    result = RAIM.availability_from_geometry(los, visible, predictor.threshold, etas)
+    clear = np.all(getattr(result, flag), axis=1)
+    return DepartureSweep(list(departures), result, clear)
@@ -0,0 +1,44 @@
+import numpy as np
+import Library_GNSS as GNSS
+
+# Check ecef_to_latlon_batch (closed form) against the iterative ecef_to_latlon
+
+rng = np.random.default_rng(0)
+lat = rng.uniform(-89.9, 89.9, 500)
+lon = rng.uniform(-180, 180, 500)
+
+# Surface points (0 to 9 km) and points at GNSS orbit altitude, all in km
+surface_alt = rng.uniform(0, 9, 500)
+orbit_alt = rng.uniform(19000, 21000, 500)
+
+for name, alt in [("Surface", surface_alt), ("GNSS orbit", orbit_alt)]:
+    r_ecef = np.stack(GNSS.latlon_to_ecef(lat, lon, alt * 1000), -1) / 1000
+    lat_b, lon_b, alt_b = GNSS.ecef_to_latlon_batch(r_ecef)
+    reference = np.array([GNSS.ecef_to_latlon(r) for r in r_ecef])
+
+    lat_error = np.max(np.abs(lat_b - reference[:, 0]))
+    lon_error = np.max(np.abs(lon_b - reference[:, 1]))
+    alt_error = np.max(np.abs(alt_b - reference[:, 2]))
+    print(f"{name}: max error lat {lat_error:.2e} deg, lon {lon_error:.2e} deg, alt {alt_error:.2e} km")
+    assert lat_error < 1e-8 and lon_error < 1e-8 and alt_error < 1e-6
+    # Round trip back to the generating coordinates
+    assert np.allclose(lat_b, lat, atol=1e-9) and np.allclose(alt_b, alt, atol=1e-6)
+
+# Polar axis: the iterative routine divides by cos(lat) there, so compare
+# with the exact answer (|z| minus the semi-minor axis)
+b = GNSS.a * (1 - GNSS.f)
+for z in [b, -b, b + 20200, -(b + 20200)]:
+    lat_b, lon_b, alt_b = GNSS.ecef_to_latlon_batch(np.array([0.0, 0.0, z]))
+    print(f"Polar axis z = {z:.3f} km: lat {lat_b:.9f} deg, alt {alt_b:.9f} km")
+    assert abs(abs(lat_b) - 90) < 1e-9 and abs(alt_b - (abs(z) - b)) < 1e-6
+
+# Just off the polar axis both routines still agree
+for pole_lat in [90 - 1e-7, -(90 - 1e-7)]:
+    r_near_pole = np.array(GNSS.latlon_to_ecef(pole_lat, 45.0, 20200e3)) / 1000
+    lat_b, lon_b, alt_b = GNSS.ecef_to_latlon_batch(r_near_pole)
+    lat_i, lon_i, alt_i = GNSS.ecef_to_latlon(r_near_pole)
+    print(f"Near pole lat {pole_lat}: lat {lat_b - lat_i:.2e} deg, alt {alt_b - alt_i:.2e} km")
+    assert abs(lat_b - lat_i) < 1e-8 and abs(alt_b - alt_i) < 1e-6
+    assert abs(lat_b - pole_lat) < 1e-9 and abs(alt_b - 20200) < 1e-6
+
+print("ecef_to_latlon_batch matches ecef_to_latlon")
@@ -0,0 +1,79 @@
+import numpy as np
+from itertools import combinations
+import Library_GNSS as GNSS
+import Library_RAIM as RAIM
+
+# Check SubsetDopEngine and search_subsets against full enumeration of the
+# subsets with cal_pdop
+
+rng = np.random.default_rng(1)
+rec_position = np.array(GNSS.latlon_to_ecef(13.683529, 100.619786, 0)) / 1000
+up = rec_position / np.linalg.norm(rec_position)
+
+
+def random_sky(num_sat):
+    """
+    num_sat satellite positions (km) above 5 degrees elevation at GPS range.
+    """
+    positions = []
+    while len(positions) < num_sat:
+        u = rng.normal(size=3)
+        u /= np.linalg.norm(u)
+        if np.dot(u, up) > np.sin(np.radians(5)):
+            positions.append(rec_position + 20200 * u)
+    return np.array(positions)
+
+
+def brute_force(sat_position, num_excluded):
+    """
+    (pdop, excluded indices) of every subset with num_excluded satellites removed.
+    """
+    num_sat = len(sat_position)
+    subsets = []
+    for excluded in combinations(range(num_sat), num_excluded):
+        keep = [i for i in range(num_sat) if i not in excluded]
+        subsets.append((GNSS.cal_pdop(sat_position[keep], rec_position), excluded))
+    return subsets
+
+
+num_epochs = 0
+for num_sat in range(5, 13):
+    for epoch in range(25):
+        sat_position = random_sky(num_sat)
+        los = RAIM.line_of_sight(sat_position, rec_position)
+        full = GNSS.cal_pdop(sat_position, rec_position)
+        singles = brute_force(sat_position, 1)
+        pairs = brute_force(sat_position, 2) if num_sat >= 6 else []
+
+        # Downdates against the inverted n-1 / n-2 subsets
+        engine = RAIM.SubsetDopEngine(los)
+        assert np.isclose(engine.pdop(), full)
+        assert np.allclose(engine.pdop_leave_one_out(), [pdop for pdop, excluded in singles])
+        if pairs:
+            pdop_x2, pair_index = engine.pdop_leave_two_out()
+            assert [tuple(pair) for pair in pair_index] == [excluded for pdop, excluded in pairs]
+            assert np.allclose(pdop_x2, [pdop for pdop, excluded in pairs])
+
+        # Pruned search against the sorted enumeration, for thresholds that
+        # make every flag both pass and fail somewhere
+        subsets = singles + pairs
+        worst = sorted(subsets, reverse=True)[:3]
+        best = sorted(subsets)[:3]
+        for threshold in [2.0, 3.0, 4.5, 6.0, 10.0]:
+            position = num_sat >= 4 and full < threshold
+            fd = num_sat >= 5 and max(pdop for pdop, excluded in singles) < threshold
+            fde = bool(pairs) and fd and max(pdop for pdop, excluded in pairs) < threshold
+
+            search = RAIM.search_subsets(los, threshold, k=3)
+            assert (search.position, search.fd, search.fde) == (position, fd, fde)
+            assert np.isclose(search.pdop, full)
+            assert [excluded for pdop, excluded in search.worst] == [e for p, e in worst]
+            assert [excluded for pdop, excluded in search.best] == [e for p, e in best]
+            assert np.allclose([pdop for pdop, excluded in search.worst], [p for p, e in worst])
+            assert np.allclose([pdop for pdop, excluded in search.best], [p for p, e in best])
+
+            decision = RAIM.search_subsets(los, threshold, decision_only=True)
+            assert (decision.position, decision.fd, decision.fde) == (position, fd, fde)
+        num_epochs += 1
+
+print(f"SubsetDopEngine and search_subsets match enumeration on {num_epochs} epochs")